@@ -13,9 +13,28 @@ Generates comprehensive build information including:
 """
 
 import os
+import re
 import json
+import itertools
 from datetime import datetime
 
+# Build constants rewritten in include/config.h
+CONFIG_DEFINE_PATTERN = re.compile(r'#define (BUILD_DATE|FIRMWARE_VERSION|BUILD_TYPE) "([^"]*)"')
+
+def write_if_changed(path, data):
+    """Atomically replace path with data unless it already holds exactly those bytes"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
 # Import PlatformIO environment
 try:
     Import("env")
@@ -39,19 +58,26 @@ class BuildInfoGenerator:
     def __init__(self, env):
         self.env = env
         self.build_info_file = "build_info.json"
+        self._pio_ini = None
         self.base_version = self._get_base_version()
         
-    def _get_base_version(self):
-        """Extract base version from platformio.ini"""
-        try:
+    @property
+    def _pio_ini_content(self):
+        """Contents of platformio.ini, read once per build"""
+        if self._pio_ini is None:
             project_dir = self.env.get("PROJECT_DIR", os.getcwd())
             config_path = os.path.join(project_dir, 'platformio.ini')
             
             with open(config_path, 'r') as f:
-                content = f.read()
+                self._pio_ini = f.read()
+        return self._pio_ini
+        
+    def _get_base_version(self):
+        """Extract base version from platformio.ini"""
+        try:
+            content = self._pio_ini_content
                 
             # Look for current_version = x.xx in [common] section
-            import re
             match = re.search(r'current_version\s*=\s*([0-9.]+)', content)
             if match:
                 return match.group(1)
@@ -60,25 +86,25 @@ class BuildInfoGenerator:
             
         return "0.9"  # Fallback version
             
-    def _get_production_build_number(self):
+    def _get_production_build_number(self, now):
         """Extract manual production build number from platformio.ini"""
         try:
-            project_dir = self.env.get("PROJECT_DIR", os.getcwd())
-            config_path = os.path.join(project_dir, 'platformio.ini')
-            
-            with open(config_path, 'r') as f:
-                content = f.read()
+            content = self._pio_ini_content
                 
             # Look for production_build = xxxxxxx in [common] section
-            import re
-            match = re.search(r'production_build\s*=\s*(\d+)', content)
-            if match:
-                return match.group(1)
+            # (plain string scanning, no regex needed for a literal key)
+            _, sep, rest = content.partition("production_build")
+            while sep:
+                value = rest.lstrip()
+                if value.startswith("="):
+                    digits = "".join(itertools.takewhile(str.isdigit, value[1:].lstrip()))
+                    if digits:
+                        return digits
+                _, sep, rest = rest.partition("production_build")
         except Exception as e:
             print(f"  Could not read production_build from platformio.ini: {e}")
         
         # Fallback to date-based number
-        now = datetime.now()
         return now.strftime("%y%m%d") + "0"
     
     def _load_build_info(self):
@@ -99,7 +125,7 @@ class BuildInfoGenerator:
         except Exception as e:
             print(f"  Warning: Could not save build info: {e}")
     
-    def _generate_build_number(self):
+    def _generate_build_number(self, now):
         """
         For production builds: Use manual production_build number from platformio.ini
         For debug builds: Generate date-based number (but debug builds shouldn't call this script)
@@ -109,13 +135,12 @@ class BuildInfoGenerator:
         
         if "production" in env_name.lower():
             # Production build: Use manual number from platformio.ini
-            build_number = self._get_production_build_number()
+            build_number = self._get_production_build_number(now)
             print(f" Using manual production build number: {build_number}")
             return build_number, 0  # No daily counter for manual builds
         else:
             # Debug build: Use original automatic logic (but this shouldn't happen)
             print(f"  Warning: Debug build calling generate_build_info.py - this should not happen")
-            now = datetime.now()
             date_part = now.strftime("%y%m%d")  # YYMMDD
             
             # Load existing build info
@@ -153,15 +178,17 @@ class BuildInfoGenerator:
     
     def generate(self):
         """Generate comprehensive build information"""
-        build_number, daily_counter = self._generate_build_number()
+        # Single timestamp for the whole build so every field agrees
+        now = datetime.now()
+        build_number, daily_counter = self._generate_build_number(now)
         
         # Generate version strings
         full_version = f"v{self.base_version}-build.{build_number}"
         version_short = f"v{self.base_version}"
         
         # Generate build timestamp
-        build_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        build_date = datetime.now().strftime("%y%m%d")
+        build_timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        build_date = now.strftime("%y%m%d")
         
         # Environment information
         env_name = self.env.get("PIOENV", "unknown")
@@ -206,37 +233,32 @@ class BuildInfoGenerator:
         config_path = os.path.join(project_dir, 'include', 'config.h')
         
         try:
-            # Read the current config.h file
-            with open(config_path, 'r') as f:
+            # Read the current config.h file (keeping its line endings so an
+            # unchanged file compares equal byte for byte)
+            with open(config_path, 'r', encoding='utf-8', newline='') as f:
                 content = f.read()
             
-            # Update the build constants
-            import re
-            
-            # Update BUILD_DATE with the full build number
-            content = re.sub(
-                r'#define BUILD_DATE "[^"]*"',
-                f'#define BUILD_DATE "{build_number}"',
-                content
-            )
+            # Update BUILD_DATE (full build number), FIRMWARE_VERSION and the
+            # debug-section BUILD_TYPE in a single scan of the file
+            values = {
+                "BUILD_DATE": build_number,
+                "FIRMWARE_VERSION": version,
+                "BUILD_TYPE": build_type,
+            }
             
-            # Update FIRMWARE_VERSION  
-            content = re.sub(
-                r'#define FIRMWARE_VERSION "[^"]*"',
-                f'#define FIRMWARE_VERSION "{version}"',
-                content
-            )
+            def replace_define(match):
+                name, current = match.group(1), match.group(2)
+                if name == "BUILD_TYPE" and current != "debug":
+                    return match.group(0)
+                return f'#define {name} "{values[name]}"'
             
-            # Update BUILD_TYPE in the debug section
-            content = re.sub(
-                r'#define BUILD_TYPE "debug"',
-                f'#define BUILD_TYPE "{build_type}"',
-                content
-            )
+            updated = CONFIG_DEFINE_PATTERN.sub(replace_define, content)
             
-            # Write the updated content back
-            with open(config_path, 'w') as f:
-                f.write(content)
+            # Write the updated content back only if it changed, so PlatformIO
+            # doesn't rebuild everything that includes config.h
+            if not write_if_changed(config_path, updated.encode('utf-8')):
+                print(f" config.h already up to date: {version}, {build_type}, {build_number}")
+                return
                 
             print(f" Updated config.h: {version}, {build_type}, {build_number}")
             
@@ -5,7 +5,9 @@ Automatically selects the correct PNG file based on build environment
 """
 
 import os
+import re
 import sys
+import hashlib
 import subprocess
 
 def detect_build_environment():
@@ -50,18 +52,44 @@ def check_existing_splash_screen(output_file, png_file, display_type):
         if f"Target display: {display_type}" not in content:
             return False, f"Generated for different display type (not {display_type})"
         
-        # Check file timestamps - regenerate if PNG is newer than header
+        # Cheap pre-filter: a PNG that isn't newer than the header is unchanged
         png_mtime = os.path.getmtime(png_file)
         header_mtime = os.path.getmtime(output_file)
         
-        if png_mtime > header_mtime:
+        if png_mtime <= header_mtime:
+            return True, "Existing file is up to date"
+        
+        # PNG looks newer (git checkout, CI cache restore) - compare content hashes
+        match = re.search(r"src-sha1: ([0-9a-f]{40})", content)
+        if not match:
             return False, "PNG file is newer than header file"
         
-        return True, "Existing file is up to date"
+        with open(png_file, 'rb') as f:
+            png_sha1 = hashlib.sha1(f.read()).hexdigest()
+        
+        if match.group(1) != png_sha1:
+            return False, "PNG file content has changed"
+        
+        return True, "Existing file is up to date (PNG content unchanged)"
         
     except Exception as e:
         return False, f"Error checking file: {e}"
 
+def convert_in_process(script_dir, png_file, output_file, display_type):
+    """Run the converter in this interpreter, avoiding a Python startup per build.
+    Returns None if the converter can't be imported so the caller can fall back
+    to running it as a subprocess"""
+    
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    try:
+        import png_to_splash_header_converter as converter
+        convert = converter.convert_png_to_header
+    except (ImportError, AttributeError):
+        return None
+    
+    return convert(png_file, output_file, display_type)
+
 def main():
     """Generate splash_screen.h based on build environment"""
     
@@ -97,11 +125,19 @@ def main():
     else:
         print(f"Regenerating splash screen: {reason}")
     
-    # Run the conversion script
-    converter_script = os.path.join(script_dir, 'png_to_splash_header_converter.py')
-    
     print(f"Converting {os.path.basename(png_file)} -> splash_screen.h")
     
+    success = convert_in_process(script_dir, png_file, output_file, display_type)
+    if success is not None:
+        if not success:
+            print("Error generating splash screen")
+            sys.exit(1)
+        print(f"Successfully generated splash_screen.h for {display_type}")
+        return
+    
+    # Fall back to running the conversion script
+    converter_script = os.path.join(script_dir, 'png_to_splash_header_converter.py')
+    
     try:
         result = subprocess.run([
             sys.executable, converter_script, png_file, output_file, display_type
@@ -3,89 +3,111 @@ import sys
 import os
 import re
 import gzip
+import json
+import hashlib
+import filecmp
 import inspect
+import importlib
+import importlib.util
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from io import BytesIO
+from io import StringIO
 
 # Constants
 src_dir = os.path.join("..", "data")
 out_dir = os.path.join("..", "include")
 out_file = "webcontent.h"
-
-# List of required packages
-required_packages = ["htmlmin2", "jsmin"]
+manifest_file = "webcontent.manifest.json"
+# Level 6 is ~3x faster than the default 9 for a marginal size penalty; mtime=0
+# keeps the compressed bytes reproducible from build to build
+gzip_level = 6
+# Below this much source data a process pool costs more to start than it saves
+parallel_min_bytes = 1 << 20
+
+# Required pip packages and the importable modules that satisfy each one
+# (preferred module first, then fallbacks). rcssmin is optional and never
+# auto-installed: process_css_file has a built-in fallback minifier.
+required_packages = {
+    "htmlmin2": ("htmlmin", "htmlmin2"),
+    "rjsmin": ("rjsmin", "jsmin", "jsmin2"),
+}
 
 current_file = inspect.getfile(inspect.currentframe())
 script_dir = os.path.dirname(os.path.abspath(current_file))
 out_path = os.path.join(script_dir, out_dir)
-entries = []
-
-def ensure_package(package):
-    try:
-        __import__(package)
-    except ImportError:
-        print(f"Installing missing package: {package}")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
 
-def sanitize_symbol(name: str):
-    # Replace dots and dashes with underscores for safe C identifiers
-    return name.replace('.', '_').replace('-', '_')
+# C literal for every byte value, so emitting an array is a table lookup per byte
+_HEX = tuple(f"0x{i:02X}" for i in range(256))
+
+# Precompiled patterns
+_WS_RE = re.compile(r'\s+')
+_TAG_GAP_RE = re.compile(r'>\s+<')
+# More secure regex pattern with proper boundaries and validation
+_SCRIPT_RE = re.compile(r'(<script(?:\s+[^>]*)?>)(.*?)(<\/script>)', re.DOTALL | re.IGNORECASE)
+_BANG_COMMENT_RE = re.compile(rb'^\s*/\*![\s\S]*?\*/\s*')
+_LEADING_COMMENT_RE = re.compile(rb'^/\*.*?\*/\s*', re.DOTALL)
+# CSS fallback minifier: a run of whitespace and/or comments collapses to one
+# space if it has whitespace outside the comments, and to nothing otherwise
+_CSS_COMMENT = r'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/'
+_CSS_RUN_RE = re.compile(rf'((?:{_CSS_COMMENT})*\s(?:\s|{_CSS_COMMENT})*)|(?:{_CSS_COMMENT})+')
+
+def write_hex_lines(out, data, bytes_per_line=16):
+    # Stream the C array initializer lines straight into the output
+    for i in range(0, len(data), bytes_per_line):
+        hexes = ', '.join(map(_HEX.__getitem__, data[i:i + bytes_per_line]))
+        out.write(f'  {hexes},\n')
+
+
+def bytes_to_c_array(raw_data, out, name="data", compress=False, bytes_per_line=16):
+    # Gzip compress the input data
+    if compress:
+        out_data = gzip.compress(raw_data, compresslevel=gzip_level, mtime=0)
+    else:
+        out_data = raw_data
+    # This asset's slice of the shared _asset_data[] initializer
+    out.write(f'  // {name}\n')
+    write_hex_lines(out, out_data, bytes_per_line)
+    # Name and payload length for the assets table
+    return name, len(out_data)
 
 
-def binary_to_c_array(full_path, compress=False, bytes_per_line=16):
-    file_name = Path(full_path).name
-    array_name = sanitize_symbol(file_name)
+def binary_to_c_array(full_path, out, compress=False, bytes_per_line=16):
     # Read binary file
     with open(full_path, "rb") as f:
         raw_data = f.read()
-    # Gzip compress the input data
-    if compress:
-        buffer = BytesIO()
-        with gzip.GzipFile(fileobj=buffer, mode="wb") as gz:
-            gz.write(raw_data)
-        out_data = buffer.getvalue()
-    else:
-        out_data = raw_data
-    # Format as C array
-    lines = []
-    for i in range(0, len(out_data), bytes_per_line):
-        chunk = out_data[i:i + bytes_per_line]
-        hexes = ', '.join(f'0x{b:02X}' for b in chunk)
-        lines.append(f'  {hexes},')
-    # Append entries
-    entry = f'    {{ "{file_name}", {array_name}, {len(out_data)} }}'
-    entries.append(entry)
-    # C-style array declaration
-    array_declaration = f"const uint8_t {array_name}[] = {{\n" + '\n'.join(lines) + "\n};"
-    return array_declaration
-
-
-def string_to_c_array(s, name="data", compress=False, bytes_per_line=16):
-    array_name = sanitize_symbol(name)
-    # Gzip compress the input string
-    if compress:
-        buffer = BytesIO()
-        with gzip.GzipFile(fileobj=buffer, mode='wb') as gz:
-            gz.write(s.encode('utf-8'))
-        out_data = buffer.getvalue()
-    else:
-        out_data = bytes(s, 'utf-8')
-    # Format as C-style array
-    lines = []
-    for i in range(0, len(out_data), bytes_per_line):
-        chunk = out_data[i:i + bytes_per_line]
-        hexes = ', '.join(f'0x{b:02X}' for b in chunk)
-        lines.append(f'  {hexes},')
-    # Append entries
-    entry = f'    {{ "{name}", {array_name}, {len(out_data)} }}'
-    entries.append(entry)
-    # C-style array declaration
-    array_declaration = f"const uint8_t {array_name}[] = {{\n" + "\n".join(lines) + "\n};"
-    return array_declaration
-
-
-def process_html_file(path):
+    return bytes_to_c_array(raw_data, out, name=Path(full_path).name, compress=compress, bytes_per_line=bytes_per_line)
+
+
+def read_text_bytes(path):
+    # Raw file bytes with CRLF and lone CR normalized to LF, matching what a
+    # universal-newlines text-mode read would embed
+    with open(path, "rb") as f:
+        return f.read().replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
+def strip_source_map(content):
+    # Remove a "//# sourceMappingURL=..." comment whose URL is on the last line,
+    # using plain byte searches (same result as the former
+    # rb'//\s*#\s*sourceMappingURL=.*$' pattern)
+    body = content[:-1] if content.endswith(b"\n") else content
+    pos = body.rfind(b"\n") + 1
+    while True:
+        marker = body.find(b"sourceMappingURL=", pos)
+        if marker == -1:
+            return content
+        slash = body.rfind(b"//", 0, marker)
+        if slash != -1 and body[slash + 2:marker].strip() == b"#":
+            return body[:slash] + content[len(body):]
+        pos = marker + 1
+
+
+def string_to_c_array(s, out, name="data", compress=False, bytes_per_line=16):
+    return bytes_to_c_array(s.encode('utf-8'), out, name=name, compress=compress, bytes_per_line=bytes_per_line)
+
+
+def process_html_file(path, out):
     print(f"Processing {path}")
     # Open source file
     with open(path, 'r', encoding='utf-8') as f:
@@ -94,10 +116,10 @@ def process_html_file(path):
     # Special handling for ultra-optimized files
     if "ultra-optimized" in path:
         # Ultra-aggressive minification for speed
-        content = re.sub(r'\s+', ' ', content)  # Collapse all whitespace
-        content = re.sub(r'>\s+<', '><', content)  # Remove spaces between tags
+        content = _WS_RE.sub(' ', content)  # Collapse all whitespace
+        content = _TAG_GAP_RE.sub('><', content)  # Remove spaces between tags
         content = content.strip()
-        return string_to_c_array(content, name=Path(path).name, compress=True)  # Ultra files get compression
+        return string_to_c_array(content, out, name=Path(path).name, compress=True)  # Ultra files get compression
     
     # Security-enhanced JavaScript minification for inline scripts
     # This implementation addresses "Bad HTML filtering regexp" security concerns by:
@@ -129,75 +151,109 @@ def process_html_file(path):
         
         return match.group(0)
     
-    # More secure regex pattern with proper boundaries and validation
-    content = re.sub(
-        r'(<script(?:\s+[^>]*)?>)(.*?)(<\/script>)',
-        minify_script_content,
-        content,
-        flags=re.DOTALL | re.IGNORECASE
-    )
+    content = _SCRIPT_RE.sub(minify_script_content, content)
     # Minify HTML
     minified_html = htmlmin.minify(content, remove_comments=True, reduce_empty_attributes=True)
     # Compress using gzip
     filename = Path(path).name
-    return string_to_c_array(minified_html, name=filename, compress=False)
+    return string_to_c_array(minified_html, out, name=filename, compress=False)
 
 
-def process_jquery_file(path):
+def process_jquery_file(path, out):
     print(f"Processing {path}")
-    # Open source file
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        # Detect and remove leading copyright comment
-        trimmed = re.sub(r'^\s*/\*![\s\S]*?\*/\s*', '', content, count=1)
-        filename = Path(path).name
-        return string_to_c_array(trimmed, name=filename, compress=True)
+    # Open source file (kept as bytes, no decode/encode round trip)
+    content = read_text_bytes(path)
+    # Detect and remove leading copyright comment
+    trimmed = _BANG_COMMENT_RE.sub(b'', content, count=1)
+    filename = Path(path).name
+    return bytes_to_c_array(trimmed, out, name=filename, compress=True)
 
 
-def process_copyright_mapping_file(path):
+def process_copyright_mapping_file(path, out):
     print(f"Processing {path}")
-    # Open source file
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        # Strip initial block comment (including multiline copyright)
-        trimmed = re.sub(r'^/\*.*?\*/\s*', '', content, flags=re.DOTALL)
-        # Remove sourceMappingURL comment at the end
-        trimmed = re.sub(r'//\s*#\s*sourceMappingURL=.*$', '', trimmed)
-        filename = Path(path).name
-        return string_to_c_array(trimmed, name=filename, compress=True)
+    # Open source file (kept as bytes, no decode/encode round trip)
+    content = read_text_bytes(path)
+    # Strip initial block comment (including multiline copyright)
+    trimmed = _LEADING_COMMENT_RE.sub(b'', content)
+    # Remove sourceMappingURL comment at the end
+    trimmed = strip_source_map(trimmed)
+    filename = Path(path).name
+    return bytes_to_c_array(trimmed, out, name=filename, compress=True)
 
 
-def process_misc_file(path):
+def process_misc_file(path, out):
     print(f"Processing {path}")
-    # Open source file
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        filename = Path(path).name
-        return string_to_c_array(content, name=filename, compress=True)
+    # Pass-through asset: embed the file bytes as they are
+    content = read_text_bytes(path)
+    filename = Path(path).name
+    return bytes_to_c_array(content, out, name=filename, compress=True)
 
 
-def process_css_file(filepath, filename):
+def process_css_file(filepath, out):
     print(f"Processing {filepath}")
+    filename = Path(filepath).name
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Minify CSS (basic)
-    content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)  # Remove comments
-    content = re.sub(r'\s+', ' ', content)  # Compress whitespace
-    content = content.strip()
+    # Minify CSS
+    if cssmin is not None:
+        content = cssmin(content)
+    else:
+        # Basic fallback when rcssmin is unavailable: remove comments and
+        # compress whitespace in a single scan
+        content = _CSS_RUN_RE.sub(lambda m: ' ' if m.group(1) else '', content)
+        content = content.strip()
     
-    return string_to_c_array(content, name=filename, compress=False)
+    return string_to_c_array(content, out, name=filename, compress=False)
+
+
+def process_binary_file(path, out):
+    print(f"Processing {path}")
+    return binary_to_c_array(path, out, compress=True)
+
+
+# Handler per file extension; js and css assets are further split by filename prefix
+asset_handlers = {
+    ".html": "process_html_file",
+    ".js": "process_misc_file",  # All other js files without copyright
+    ".css": "process_css_file",
+    ".ico": "process_binary_file",
+    ".jpg": "process_binary_file",
+}
+prefix_handlers = {
+    ".js": (
+        (("jquery",), "process_jquery_file"),
+        (("bootstrap", "popper"), "process_copyright_mapping_file"),
+    ),
+    ".css": (
+        (("bootstrap",), "process_copyright_mapping_file"),
+    ),
+}
 
 
-def make_index():
+def select_handler(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    for prefixes, handler in prefix_handlers.get(ext, ()):
+        if filename.startswith(prefixes):
+            return handler
+    return asset_handlers.get(ext)
+
+
+def make_index(index):
+    # index: (filename, name_offset, data_offset, length), sorted by filename
+    rows = '\n'.join(
+        f'    {{ {name_offset}, {data_offset}, {length} }},  // {name}'
+        for name, name_offset, data_offset, length in index
+    )
     struct = """typedef struct {
-    const char* filename;
-    const uint8_t* data;
-    const unsigned int length;
+    uint32_t name_offset;  // Offset of the NUL-terminated filename in _asset_names
+    uint32_t data_offset;  // Offset of the payload in _asset_data
+    uint32_t length;       // Payload length in bytes
 } EmbeddedAsset;
 
-const EmbeddedAsset assets[] = {
-""" + ',\n'.join(entries) + "\n};"
+// Sorted by filename so getAsset() can binary search
+constexpr EmbeddedAsset assets[] = {
+""" + rows + "\n};"
 
     return struct
 
@@ -206,13 +262,34 @@ def generate_utility_functions():
     return '''
 // Auto-generated utility functions
 #include <Arduino.h>
+#include <algorithm>
+#include <cstring>
+
+// Get total number of assets
+inline size_t getAssetCount() {
+    return sizeof(assets) / sizeof(assets[0]);
+}
 
-// Get asset by filename
+// Filename of an asset
+inline const char* assetFilename(const EmbeddedAsset* asset) {
+    return _asset_names + asset->name_offset;
+}
+
+// Payload of an asset
+inline const uint8_t* assetData(const EmbeddedAsset* asset) {
+    return _asset_data + asset->data_offset;
+}
+
+// Get asset by filename (binary search over the sorted table)
 inline const EmbeddedAsset* getAsset(const char* filename) {
-    for (size_t i = 0; i < sizeof(assets) / sizeof(assets[0]); i++) {
-        if (strcmp(assets[i].filename, filename) == 0) {
-            return &assets[i];
-        }
+    const EmbeddedAsset* first = assets;
+    const EmbeddedAsset* last = assets + getAssetCount();
+    const EmbeddedAsset* it = std::lower_bound(first, last, filename,
+        [](const EmbeddedAsset& asset, const char* name) {
+            return strcmp(_asset_names + asset.name_offset, name) < 0;
+        });
+    if (it != last && strcmp(assetFilename(it), filename) == 0) {
+        return it;
     }
     return nullptr;
 }
@@ -220,37 +297,33 @@ inline const EmbeddedAsset* getAsset(const char* filename) {
 // Convert binary data to String
 inline String assetToString(const EmbeddedAsset* asset) {
     if (asset == nullptr) return String();
-    return String((char*)asset->data, asset->length);
+    return String((const char*)assetData(asset), asset->length);
 }
 
 // Direct access to main portal HTML
 inline String getPortalHTML() {
-    return String((char*)portal_html, sizeof(portal_html) - 1);
+    return assetToString(getAsset("portal.html"));
 }
 
 // Direct access to index HTML
 inline String getIndexHTML() {
-    return String((char*)index_html, sizeof(index_html) - 1);
+    return assetToString(getAsset("index.html"));
 }
 
 // Direct access to settings HTML
 inline String getSettingsHTML() {
-    return String((char*)settings_html, sizeof(settings_html) - 1);
+    return assetToString(getAsset("settings.html"));
 }
 
 // Direct access to CSS files
 inline String getStylesCSS() {
-    return String((char*)styles_css, sizeof(styles_css) - 1);
+    return assetToString(getAsset("styles.css"));
 }
 
 // Get portal HTML size
 inline size_t getPortalHTMLSize() {
-    return sizeof(portal_html) - 1;
-}
-
-// Get total number of assets
-inline size_t getAssetCount() {
-    return sizeof(assets) / sizeof(assets[0]);
+    const EmbeddedAsset* asset = getAsset("portal.html");
+    return asset ? asset->length : 0;
 }
 
 // Get asset by index
@@ -261,78 +334,215 @@ inline const EmbeddedAsset* getAssetByIndex(size_t index) {
 '''
 
 
+def file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    # Write to a temp file first so an interrupted build never leaves a half-written manifest
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fingerprint_sources(src_path, previous):
+    # Map each source file to (mtime_ns, size, sha1). The sha1 of a file whose
+    # mtime and size match the previous manifest is reused, so an unchanged tree
+    # costs a single stat() per file; a changed mtime alone (git checkout, CI
+    # cache restore) only costs a re-hash, not a regeneration.
+    old_files = previous.get("files", {})
+    files = {}
+    for entry in sorted(os.scandir(src_path), key=lambda e: e.name):
+        if not entry.is_file():
+            continue
+        st = entry.stat()
+        old = old_files.get(entry.name)
+        if old and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+            sha1 = old[2]
+        else:
+            sha1 = file_sha1(entry.path)
+        files[entry.name] = [st.st_mtime_ns, st.st_size, sha1]
+    return files
+
+
+def is_up_to_date(manifest, previous, output_file):
+    if not os.path.exists(output_file):
+        return False
+    if manifest["tool"] != previous.get("tool"):
+        return False
+    old_files = previous.get("files", {})
+    if manifest["files"].keys() != old_files.keys():
+        return False
+    return all(entry[1:] == old_files[name][1:] for name, entry in manifest["files"].items())
+
+
+def install_missing_packages():
+    # find_spec only locates modules without importing them; pip is invoked
+    # once, and only for packages with neither the module nor a fallback present
+    missing = [
+        package for package, modules in required_packages.items()
+        if all(importlib.util.find_spec(module) is None for module in modules)
+    ]
+    if missing:
+        print(f"Installing missing packages: {', '.join(missing)}")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
+        importlib.invalidate_caches()
+
+
+def import_minifiers():
+    # Prefer the C-accelerated rjsmin/rcssmin, fall back to the pure-Python minifiers
+    global htmlmin, jsmin, cssmin
+    try:
+        import htmlmin
+    except ImportError:
+        import htmlmin2 as htmlmin
+    try:
+        from rjsmin import jsmin as _rjsmin
+
+        def jsmin(script):
+            return _rjsmin(script, keep_bang_comments=False)
+    except ImportError:
+        try:
+            from jsmin import jsmin
+        except ImportError:
+            from jsmin2 import jsmin
+    try:
+        from rcssmin import cssmin
+    except ImportError:
+        cssmin = None
+
+
+def render_asset(handler_name, path):
+    # Run one process_* handler into a private buffer and return
+    # (text, filename, length), so assets can be rendered in worker processes
+    # and assembled into the shared blob afterwards
+    import_minifiers()
+    buffer = StringIO()
+    name, length = globals()[handler_name](path, buffer)
+    return buffer.getvalue(), name, length
+
+
+def load_worker_module():
+    # Pool workers look up render_asset by module name. Under PlatformIO this
+    # script is exec'd by SCons rather than imported, so import it by name to
+    # give the workers a module they can resolve.
+    if __name__ == "__main__":
+        return sys.modules[__name__]
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    return importlib.import_module(Path(current_file).stem)
+
+
+def render_assets(tasks):
+    # Minify, compress and hex-encode every asset; the files are independent,
+    # so large jobs fan out over a process pool and collect results in task
+    # order, while small jobs and single-CPU hosts stay sequential
+    max_workers = min(os.cpu_count() or 1, len(tasks))
+    total_size = sum(os.path.getsize(path) for _, path in tasks)
+    if max_workers > 1 and total_size >= parallel_min_bytes:
+        try:
+            worker = load_worker_module()
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(worker.render_asset, *task) for task in tasks]
+                return [future.result() for future in futures]
+        except (ImportError, BrokenProcessPool, OSError, pickle.PicklingError) as e:
+            # Only pool start-up and transport failures; handler errors propagate
+            print(f"Parallel processing unavailable ({e}), processing files sequentially")
+    return [render_asset(*task) for task in tasks]
+
+
 # =====================================
 # Entry point
 # =====================================
 
-print(f"Generating HTML content")
+def main():
+    print(f"Generating HTML content")
 
-# Try installing missing packages
-for package in required_packages:
-    try:
-        __import__(package)
-    except ImportError:
-        print(f"Installing missing package: {package}")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-
-# Now safe to import
-try:
-    import htmlmin
-except ImportError:
-    import htmlmin2 as htmlmin
-try:
-    from jsmin import jsmin
-except ImportError:
-    from jsmin2 import jsmin
-
-# Clean existing file
-output_file = os.path.join(script_dir, '..', 'include', 'webcontent.h')
-output_file = os.path.normpath(output_file)
-if os.path.exists(output_file):
-    os.remove(output_file)
-
-src_path = os.path.normpath(os.path.join(script_dir, src_dir))
-
-# Process all source files one by one
-with open(output_file, "w", encoding="utf-8") as f:
-    # Prepend the header file
-    f.write("#pragma once\n")
-    f.write("#include <cstdint>\n\n")
+    output_file = os.path.normpath(os.path.join(out_path, out_file))
+    manifest_path = os.path.normpath(os.path.join(out_path, manifest_file))
+    src_path = os.path.normpath(os.path.join(script_dir, src_dir))
+
+    # Skip the whole pipeline when neither the sources nor this script changed
+    previous = load_manifest(manifest_path)
+    manifest = {
+        "tool": file_sha1(current_file),
+        "files": fingerprint_sources(src_path, previous),
+    }
+    if is_up_to_date(manifest, previous, output_file):
+        if manifest != previous:
+            save_manifest(manifest_path, manifest)  # Refresh mtimes for the next stat-only check
+        print(f"{out_file} is up to date, skipping regeneration")
+        return
+
+    # Try installing missing packages
+    install_missing_packages()
+
+    # Now safe to import
+    import_minifiers()
 
     # Define core files to process (avoid duplicates and backups)
     core_files = ['index.html', 'settings.html', 'portal.html', 'styles.css']
-    
-    # Process only core files in the src directory
-    for filename in os.listdir(src_path):
-        if filename not in core_files and not filename.endswith('.backup'):
+
+    # Queue only core files in the src directory, in name order for stable output
+    tasks = []
+    for entry in sorted(os.scandir(src_path), key=lambda e: e.name):
+        if entry.name not in core_files and not entry.name.endswith('.backup'):
             continue  # Skip non-core files and backups
-            
-        full_path = os.path.join(src_path, filename)
-        # html
-        if filename.endswith('.html'):
-            f.write(process_html_file(full_path) + "\n")
-        # js
-        elif filename.endswith('.js'):
-            # jquery*.js, bootstrap*.js
-            if filename.startswith("jquery"):
-                f.write(process_jquery_file(full_path) + "\n")
-            # bootstrap*.js, popper*.js
-            elif filename.startswith(("bootstrap", "popper")):
-                f.write(process_copyright_mapping_file(full_path) + "\n")
-            # All other js files without copyright 
-            else:
-                f.write(process_misc_file(full_path) + "\n")
-        # css
-        elif filename.endswith('.css'):
-            if filename.startswith('bootstrap'):
-                f.write(process_copyright_mapping_file(full_path) + "\n")
-            else:
-                f.write(process_css_file(full_path, filename) + "\n")
-        # ico, jpg
-        elif filename.endswith((".ico",".jpg")):
-            f.write(binary_to_c_array(full_path, compress=True) + "\n")
-
-    # Append entries as a C-style index array
-    f.write("\n" + make_index() + "\n")
-    f.write(generate_utility_functions())
 
+        handler = select_handler(entry.name)
+        if handler is not None:
+            tasks.append((handler, entry.path))
+
+    # Sort by the filename bytes, i.e. the order strcmp() sees at runtime
+    results = sorted(render_assets(tasks), key=lambda result: result[1].encode("utf-8"))
+
+    # Stream into a temp file and only replace webcontent.h if it changed, so
+    # an identical header doesn't invalidate PlatformIO's compiled objects
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+        # Prepend the header file
+        f.write("#pragma once\n")
+        f.write("#include <cstdint>\n\n")
+
+        # All payloads in one contiguous array, one relocation instead of one per asset
+        f.write("// Payloads of all embedded assets, concatenated in filename order\n")
+        f.write("const uint8_t _asset_data[] = {\n")
+        index = []
+        name_offset = data_offset = 0
+        for text, name, length in results:
+            f.write(text)
+            index.append((name, name_offset, data_offset, length))
+            name_offset += len(name.encode("utf-8")) + 1
+            data_offset += length
+        f.write("};\n\n")
+
+        # NUL-terminated filenames, concatenated in the same order
+        f.write("const char _asset_names[] =\n")
+        f.write("\n".join(f'  "{name}\\0"' for name, *_ in index) + ";\n")
+
+        # Append the offset table as a C-style index array
+        f.write("\n" + make_index(index) + "\n")
+        f.write(generate_utility_functions())
+
+    if os.path.exists(output_file) and filecmp.cmp(tmp_file, output_file, shallow=False):
+        os.remove(tmp_file)
+        print(f"{out_file} unchanged")
+    else:
+        os.replace(tmp_file, output_file)
+    save_manifest(manifest_path, manifest)
+
+
+# Run as a script or as a PlatformIO extra script, but not when imported by
+# pool workers (required for the spawn start method on Windows/macOS)
+if __name__ == "__main__" or "Import" in globals():
+    main()
@@ -4,22 +4,35 @@ PNG to Splash Screen Header Converter
 Converts PNG files to RGB565 format for ST7735/ST7789 TFT displays
 
 Usage:
-    python png_to_splash_header_converter.py input.png output.h [display_type]
+    python png_to_splash_header_converter.py input.png output.h [display_type] [--binary]
 
 Arguments:
     input.png    - Source PNG file
     output.h     - Output header file
     display_type - ST7735 (80x160) or ST7789 (240x240) [default: auto-detect from image size]
+    --binary     - Write raw RGB565 pixels to output.bin and .incbin them from a small header
 
 Requirements:
     pip install Pillow
+    pip install numpy  (optional, vectorized color conversion)
+    pip install numba  (optional, JIT-compiled parallel conversion with --numba)
 """
 
 import sys
 import os
+import hashlib
+from array import array
 from PIL import Image
 import argparse
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to per-pixel conversion
+
+numba = None  # Imported on demand by load_numba_kernel()
+_numba_kernel = None
+
 def rgb888_to_rgb565(r, g, b):
     """Convert RGB888 to RGB565 format"""
     # Convert 8-bit values to 5-bit (red), 6-bit (green), 5-bit (blue)
@@ -30,6 +43,123 @@ def rgb888_to_rgb565(r, g, b):
     # Pack into 16-bit value: RRRRRGGG GGGBBBBB
     return (r5 << 11) | (g6 << 5) | b5
 
+def file_sha1(path):
+    """SHA-1 of the source image, recorded so rebuilds can detect real changes"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def rgb888_to_rgb565_array(pixels):
+    """Convert an (..., 3) uint8 RGB888 array to RGB565 in one vectorized pass"""
+    r = pixels[..., 0].astype(np.uint16)
+    g = pixels[..., 1].astype(np.uint16)
+    b = pixels[..., 2].astype(np.uint16)
+    
+    # Pack into 16-bit value: RRRRRGGG GGGBBBBB
+    return ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3)
+
+def load_numba_kernel():
+    """JIT the parallel Numba kernel on first use, or return None if numba or
+    numpy is missing. Opt-in only: for splash-sized images the numba import and
+    kernel load cost far more than the NumPy conversion they replace."""
+    global numba, _numba_kernel
+    if _numba_kernel is None and np is not None:
+        try:
+            import numba
+        except ImportError:
+            return None
+        
+        @numba.njit(parallel=True, cache=True)
+        def _rgb565_numba(arr_u8, out_u16):
+            """Convert an (N, 3) uint8 RGB888 array into out_u16 across all cores,
+            without the temporaries of the NumPy expression"""
+            for i in numba.prange(arr_u8.shape[0]):
+                r = np.uint16(arr_u8[i, 0])
+                g = np.uint16(arr_u8[i, 1])
+                b = np.uint16(arr_u8[i, 2])
+                out_u16[i] = ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3)
+        
+        _numba_kernel = _rgb565_numba
+    return _numba_kernel
+
+def image_to_rgb565_bytes(raw, byteorder='big', kernel=None):
+    """Convert packed RGB888 bytes to packed RGB565 bytes in the given byte order,
+    optionally with a kernel from load_numba_kernel()"""
+    if np is not None:
+        pixels = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        if kernel is not None:
+            rgb565 = np.empty(len(pixels), dtype=np.uint16)
+            kernel(pixels, rgb565)
+        else:
+            rgb565 = rgb888_to_rgb565_array(pixels)
+        dtype = '>u2' if byteorder == 'big' else '<u2'
+        return rgb565.astype(dtype).tobytes()
+    
+    values = array('H', (rgb888_to_rgb565(r, g, b) for r, g, b in zip(raw[0::3], raw[1::3], raw[2::3])))
+    if sys.byteorder != byteorder:
+        values.byteswap()
+    return values.tobytes()
+
+def convert_indexed(indices, palette, byteorder):
+    """Map 8-bit pixel indices through a 256-entry RGB palette. Each entry is
+    packed to RGB565 once; bytes.translate then does the per-pixel work."""
+    values = [rgb888_to_rgb565(*palette[i * 3:i * 3 + 3]) for i in range(256)]
+    high = bytes(v >> 8 for v in values)
+    low = bytes(v & 0xFF for v in values)
+    if byteorder == 'little':
+        high, low = low, high
+    
+    out = bytearray(len(indices) * 2)
+    out[0::2] = indices.translate(high)
+    out[1::2] = indices.translate(low)
+    return bytes(out)
+
+def _convert_rgb(image, byteorder, kernel=None):
+    assert image.mode == 'RGB'
+    return image_to_rgb565_bytes(image.tobytes(), byteorder, kernel)
+
+def _convert_l(image, byteorder, kernel=None):
+    gray = [v for v in range(256) for _ in range(3)]
+    return convert_indexed(image.tobytes(), gray, byteorder)
+
+def _convert_p(image, byteorder, kernel=None):
+    palette = image.getpalette() or []
+    palette += [0] * (768 - len(palette))
+    return convert_indexed(image.tobytes(), palette, byteorder)
+
+# Modes converted directly; anything else goes through image.convert('RGB')
+mode_converters = {
+    'RGB': _convert_rgb,
+    'L': _convert_l,
+    'P': _convert_p,
+}
+
+def write_incbin_data(f, bin_file):
+    """Declare epd_bitmap_ as the contents of bin_file, pulled in by the assembler.
+    The path is written relative to the working directory, which is the project
+    root when run from PlatformIO (the compiler is invoked from there too)."""
+    bin_path = os.path.relpath(bin_file).replace(os.sep, '/')
+    f.write(f"// Pixel data is embedded from {bin_path} (RGB565, little-endian)\n")
+    f.write("// Include this header from a single source file only\n")
+    f.write("__asm__(\n")
+    f.write("    \".section .rodata.splash_screen, \\\"a\\\"\\n\"\n")
+    f.write("    \".balign 4\\n\"\n")
+    f.write("    \".global epd_bitmap_\\n\"\n")
+    f.write("    \"epd_bitmap_:\\n\"\n")
+    f.write(f"    \".incbin \\\"{bin_path}\\\"\\n\"\n")
+    f.write("    \".previous\\n\"\n")
+    f.write(");\n")
+    f.write('extern "C" const uint16_t epd_bitmap_[];\n\n')
+
+def format_rgb565_data(rgb565_be, pixels_per_line=8):
+    """Format big-endian RGB565 bytes as C initializer lines in a single pass
+    (8 hex values per line for readability)"""
+    hex_str = rgb565_be.hex().upper()
+    tokens = ["0x" + hex_str[i:i + 4] for i in range(0, len(hex_str), 4)]
+    lines = [", ".join(tokens[i:i + pixels_per_line]) for i in range(0, len(tokens), pixels_per_line)]
+    if not lines:
+        return ""
+    return "  " + ", \n  ".join(lines) + "\n"
+
 def detect_display_type(width, height):
     """Auto-detect display type based on image dimensions"""
     if width == 80 and height == 160:
@@ -41,18 +171,20 @@ def detect_display_type(width, height):
     else:
         return "CUSTOM"
 
-def convert_png_to_header(input_file, output_file, display_type=None):
-    """Convert PNG file to RGB565 header file"""
+def convert_png_to_header(input_file, output_file, display_type=None, binary=False, use_numba=False):
+    """Convert PNG file to RGB565 header file (plus a raw .bin sidecar if binary)"""
     
     try:
         # Open and process the image
         print(f"Opening image: {input_file}")
         image = Image.open(input_file)
         
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
+        # Pick the converter for this mode once, up front
+        converter = mode_converters.get(image.mode)
+        if converter is None:
             print(f"Converting from {image.mode} to RGB")
             image = image.convert('RGB')
+            converter = _convert_rgb
         
         width, height = image.size
         print(f"Image size: {width}x{height}")
@@ -75,22 +207,35 @@ def convert_png_to_header(input_file, output_file, display_type=None):
                 print(f"Warning: Unexpected dimensions for {display_type}")
                 print(f"Expected: {expected_dims[display_type]}, got: ({width}, {height})")
         
-        # Get pixel data
-        pixels = list(image.getdata())
-        total_pixels = len(pixels)
+        # Convert pixels to RGB565: big-endian bytes for hex formatting, or
+        # little-endian (the ESP32's native order) for the raw sidecar
+        kernel = None
+        if use_numba:
+            kernel = load_numba_kernel()
+            if kernel is None:
+                print("numba/numpy not available, using the default conversion")
+        rgb565 = converter(image, 'little' if binary else 'big', kernel)
+        total_pixels = len(rgb565) // 2
         total_bytes = total_pixels * 2  # 2 bytes per pixel for RGB565
         
         print(f"Total pixels: {total_pixels}")
         print(f"Output size: {total_bytes} bytes")
         
+        if binary:
+            bin_file = os.path.splitext(output_file)[0] + '.bin'
+            print(f"Writing binary data: {bin_file}")
+            with open(bin_file, 'wb') as f:
+                f.write(rgb565)
+        
         # Generate header file
         print(f"Generating header file: {output_file}")
         
-        with open(output_file, 'w') as f:
+        with open(output_file, 'w', buffering=1 << 20) as f:
             # Write header comments
             f.write("/*\n")
             f.write(" * Splash screen color bitmap header file\n")
             f.write(f" * Generated from {os.path.basename(input_file)}\n")
+            f.write(f" * src-sha1: {file_sha1(input_file)}\n")
             f.write(f" * Target display: {display_type}\n")
             f.write(f" * Image size: {width}x{height} pixels\n")
             f.write(f" * RGB565 color bitmap ({width}x{height}, {total_bytes} bytes)\n")
@@ -111,35 +256,17 @@ def convert_png_to_header(input_file, output_file, display_type=None):
             # Write bitmap data
             f.write("// Splash screen color bitmap data (RGB565)\n")
             f.write(f"// Compatible with {display_type} ({width}x{height})\n")
-            f.write("const uint16_t epd_bitmap_[] PROGMEM = {\n")
-            
-            # Convert pixels to RGB565 and write data
-            pixels_per_line = 8  # 8 hex values per line for readability
-            for i, pixel in enumerate(pixels):
-                if isinstance(pixel, tuple) and len(pixel) >= 3:
-                    r, g, b = pixel[0], pixel[1], pixel[2]
-                else:
-                    # Handle grayscale or other formats
-                    r = g = b = pixel if isinstance(pixel, int) else pixel[0]
-                
-                rgb565 = rgb888_to_rgb565(r, g, b)
-                
-                # Format output
-                if i % pixels_per_line == 0:
-                    f.write("  ")
-                
-                f.write(f"0x{rgb565:04X}")
+            if binary:
+                write_incbin_data(f, bin_file)
+            else:
+                f.write("const uint16_t epd_bitmap_[] PROGMEM = {\n")
                 
-                if i < total_pixels - 1:
-                    f.write(", ")
+                # Write RGB565 data
+                f.write(format_rgb565_data(rgb565))
                 
-                if (i + 1) % pixels_per_line == 0:
-                    f.write("\n")
+                # Close the array
+                f.write("};\n\n")
             
-            # Close the array and header
-            if total_pixels % pixels_per_line != 0:
-                f.write("\n")
-            f.write("};\n\n")
             f.write("#endif // SPLASH_SCREEN_H\n")
         
         print(f" Successfully generated {output_file}")
@@ -159,6 +286,7 @@ def main():
 Examples:
   python png_to_splash_header_converter.py splash_80x160.png splash_screen.h
   python png_to_splash_header_converter.py splash_240x240.png splash_screen.h ST7789
+  python png_to_splash_header_converter.py splash_240x240.png include/splash_screen.h --binary
   
 Supported display types:
   ST7735      - 80x160 or 160x80 pixels
@@ -172,6 +300,10 @@ Supported display types:
     parser.add_argument('display_type', nargs='?', default=None,
                        choices=['ST7735', 'ST7789', 'CUSTOM'],
                        help='Target display type (auto-detected if not specified)')
+    parser.add_argument('--binary', action='store_true',
+                       help='Write pixels to a raw .bin next to the header and embed it with .incbin')
+    parser.add_argument('--numba', action='store_true',
+                       help='Convert with a parallel Numba kernel (only worth it for very large images)')
     
     args = parser.parse_args()
     
@@ -186,7 +318,7 @@ Supported display types:
         os.makedirs(output_dir)
     
     # Convert the file
-    success = convert_png_to_header(args.input, args.output, args.display_type)
+    success = convert_png_to_header(args.input, args.output, args.display_type, args.binary, args.numba)
     
     return 0 if success else 1
 
@@ -14,7 +14,88 @@ except:
     pass
 
 import os
+import re
 import shutil
+import sys
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: no reflink support
+
+# Environment names look like esp32dev-st7735-production
+ENV_NAME_PATTERN = re.compile(r'(esp32dev|esp32s3)[-_](st7735|st7789)[-_](debug|production)')
+
+PLATFORM_NAMES = {
+    'esp32dev': 'esp32',
+    'esp32s3': 'esp32s3',
+}
+
+# Buffer size for the copyfileobj fallback (firmware images are a few MB)
+COPY_BUFFER_SIZE = 1 << 20
+
+# Prefix compared when checking whether the archived copy is current
+CHECK_PREFIX_SIZE = 64 * 1024
+
+# Linux FICLONE ioctl, _IOW(0x94, 9, int); fcntl only exports it on Python 3.12+
+FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+
+def reflink(src, dst):
+    """Share the source's blocks copy-on-write (btrfs, XFS); False if unsupported"""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        # Different filesystem, or one without reflink support
+        return False
+    return True
+
+def sendfile_all(src, dst, size):
+    """Copy size bytes from src to dst in the kernel; False if unsupported here"""
+    offset = 0
+    try:
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    except OSError:
+        # e.g. macOS only supports socket destinations
+        return False
+    return offset == size
+
+def prefix_crc32(path):
+    with open(path, 'rb') as f:
+        return zlib.crc32(f.read(CHECK_PREFIX_SIZE))
+
+def is_up_to_date(source_path, dest_path):
+    """True when dest already holds this build: same size, not older than the
+    source (copystat carries the mtime over), and the same leading 64 KiB"""
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != dest_stat.st_size or source_stat.st_mtime_ns > dest_stat.st_mtime_ns:
+        return False
+    return prefix_crc32(source_path) == prefix_crc32(dest_path)
+
+def copy_firmware(source_path, dest_path):
+    """Copy the firmware with as little I/O as possible, keeping metadata like copy2.
+    Tries a reflink first, then sendfile, then a buffered copy. A hard link is not
+    used: esptool rewrites the build output in place, which would change the archive."""
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        copied = reflink(src, dst)
+        if not copied and hasattr(os, 'sendfile'):
+            copied = sendfile_all(src, dst, os.fstat(src.fileno()).st_size)
+        if not copied:
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    shutil.copystat(source_path, dest_path)
 
 def rename_firmware(source, target, env):
     """Rename firmware binary to descriptive name - PRODUCTION BUILDS ONLY"""
@@ -28,20 +109,17 @@ def rename_firmware(source, target, env):
         print(f" Only production builds are copied to firmware/ folder")
         return
     
-    # Parse environment name to extract info
-    platform = "unknown"
-    display = "unknown" 
-    build_type = "production"  # We know it's production at this point
+    # Parse environment name to extract info in one pass (suffixes such as
+    # -ota are allowed); refuse to archive a production build under unknown names
+    match = ENV_NAME_PATTERN.match(env_name)
+    if match is None:
+        print(f" Error: cannot parse environment name '{env_name}'")
+        print(f" Expected <esp32dev|esp32s3>-<st7735|st7789>-production")
+        return 1
     
-    if "esp32dev" in env_name:
-        platform = "esp32"
-    elif "esp32s3" in env_name:
-        platform = "esp32s3"
-    
-    if "st7735" in env_name:
-        display = "ST7735"
-    elif "st7789" in env_name:
-        display = "ST7789"
+    board, display, build_type = match.groups()
+    platform = PLATFORM_NAMES[board]
+    display = display.upper()
     
     # Create descriptive filename (no date stamp in filename)
     firmware_name = f"{platform}_{display}_{build_type}.bin"
@@ -57,8 +135,12 @@ def rename_firmware(source, target, env):
     dest_path = os.path.join(firmware_dir, firmware_name)
     
     try:
+        if is_up_to_date(source_path, dest_path):
+            print(f" Firmware up to date: firmware/{firmware_name}")
+            return
+        
         # Copy firmware to descriptive name
-        shutil.copy2(source_path, dest_path)
+        copy_firmware(source_path, dest_path)
         
         print(f" Firmware copied to: firmware/{firmware_name}")
         print(f" Ready for OTA upload: {firmware_name}")